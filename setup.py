@@ -17,8 +17,13 @@ setup(
     url="https://github.com/Danielskry/SpectralZK",
     packages=find_packages(),
     python_requires=">=3.8",
-    install_requires=[],
+    install_requires=[
+        "numpy>=1.20",
+    ],
     extras_require={
+        "jit": [
+            "numba",
+        ],
         "dev": [
             "pytest>=6.0.0",
             "black>=21.0.0",
@@ -7,8 +7,8 @@ system. The code is straightforward and meant for experimentation and learning.
 """
 
 from .protocol import SpectralProtocol, Instance, Witness, Challenge, Response
-from .tiling import Tiling, Point
-from .commitment import Commitment
+from .tiling import Tiling, Point, TILE_TYPES, TILE_INDEX
+from .commitment import Commitment, MerkleCommitment
 
 __version__ = "0.1.0"
 __all__ = [
@@ -19,5 +19,8 @@ __all__ = [
     "Response",
     "Tiling",
     "Point",
-    "Commitment"
+    "TILE_TYPES",
+    "TILE_INDEX",
+    "Commitment",
+    "MerkleCommitment",
 ]
@@ -0,0 +1,192 @@
+"""
+Compiled kernels for tiling generation.
+
+These functions are compiled with Numba when it is installed. Numba is an
+optional dependency (the "jit" extra): without it HAVE_NUMBA is False and
+callers fall back to the NumPy implementations in tiling.py, which produce
+identical output.
+
+Importing numba takes longer than importing the rest of the package, and
+the kernels only pay off on large inputs, so numba is not imported until
+the first kernel call.
+"""
+
+import functools
+import importlib.util
+import threading
+
+import numpy as np
+
+HAVE_NUMBA = importlib.util.find_spec("numba") is not None
+
+# Kernels, callees first, rebound to their compiled versions on first use
+_KERNELS = ("_mix", "fill_region", "walk", "period_rates")
+_COMPILE_LOCK = threading.Lock()
+_compiled = False
+
+
+def _compile():
+    """Rebind every kernel in this module to its numba-compiled version."""
+    global _compiled
+    with _COMPILE_LOCK:
+        if _compiled:
+            return
+        try:
+            from numba import njit
+        except ImportError:  # numba is optional
+            def njit(**kwargs):
+                return lambda func: func
+        module = globals()
+        # All names are rebound before any kernel compiles, so that
+        # kernels calling _mix pick up the compiled one
+        for name in _KERNELS:
+            module[name] = njit(cache=True)(module[name].py_func)
+        _compiled = True
+
+
+def _jit(func):
+    """Compile func with numba on its first call."""
+    @functools.wraps(func)
+    def first_call(*args):
+        _compile()
+        return globals()[func.__name__](*args)
+    first_call.py_func = func
+    return first_call
+
+
+# Must match the constants in tiling.py
+_P2 = np.uint64(0xC2B2AE3D27D4EB4F)
+_P3 = np.uint64(0x165667B19E3779F9)
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+_LOW32 = np.uint64(0xFFFFFFFF)
+
+
+@_jit
+def _mix(seed_term, x, y):
+    """SplitMix64 of the folded (seed, x, y) word."""
+    z = seed_term ^ (np.uint64(x) * _P2) ^ (np.uint64(y) * _P3)
+    z = z ^ (z >> np.uint64(30))
+    z = z * _M1
+    z = z ^ (z >> np.uint64(27))
+    z = z * _M2
+    return z ^ (z >> np.uint64(31))
+
+
+@_jit
+def fill_region(seed_term, x0, y0, width, height, num_types):
+    """
+    Compute the (height, width) int8 grid of tile indices.
+
+    Same rules as Tiling._region_indices: base types first, then the
+    local constraints from the NW, N, NE and W base types.
+    """
+    base_value = np.empty((height, width), np.int64)
+    for y in range(height):
+        for x in range(width):
+            base_value[y, x] = np.int64(_mix(seed_term, x0 + x, y0 + y) & _LOW32)
+
+    grid = np.empty((height, width), np.int8)
+    for y in range(height):
+        for x in range(width):
+            value = base_value[y, x]
+            mask = 0
+            count = 0
+            if y > 0:
+                if x > 0:
+                    mask |= 1 << (base_value[y - 1, x - 1] % num_types)
+                    count += 1
+                mask |= 1 << (base_value[y - 1, x] % num_types)
+                count += 1
+                if x < width - 1:
+                    mask |= 1 << (base_value[y - 1, x + 1] % num_types)
+                    count += 1
+            if x > 0:
+                mask |= 1 << (base_value[y, x - 1] % num_types)
+                count += 1
+
+            # Surrounded by a single type: force a different one
+            if count >= 3 and (mask & (mask - 1)) == 0:
+                value += 1
+            # A and B together map to C or D
+            if (mask & 0b11) == 0b11:
+                value = value % 2 + 2
+            grid[y, x] = value % num_types
+
+    return grid
+
+
+@_jit
+def walk(grid, sx, sy, length):
+    """
+    Walk from (sx, sy) to the smallest unvisited neighbor by (x, y).
+
+    Same walk as SpectralProtocol._find_path. Returns the visited x and
+    y coordinates and their tile indices.
+    """
+    height, width = grid.shape
+    xs = np.empty(length, np.int32)
+    ys = np.empty(length, np.int32)
+    tiles = np.empty(length, np.int8)
+    visited = np.zeros((height, width), np.bool_)
+
+    n = 0
+    x, y = sx, sy
+    if x < 0 or y < 0 or x >= width or y >= height:
+        return xs[:0], ys[:0], tiles[:0]
+
+    for _ in range(length):
+        xs[n] = x
+        ys[n] = y
+        tiles[n] = grid[y, x]
+        visited[y, x] = True
+        n += 1
+
+        # Offsets in (dx, dy) order, as in tiling._NEIGHBOR_OFFSETS
+        found = False
+        for dx in range(-1, 2):
+            for dy in range(-1, 2):
+                if dx == 0 and dy == 0:
+                    continue
+                nx = x + dx
+                ny = y + dy
+                if 0 <= nx < width and 0 <= ny < height and not visited[ny, nx]:
+                    x = nx
+                    y = ny
+                    found = True
+                    break
+            if found:
+                break
+        if not found:
+            break
+
+    return xs[:n], ys[:n], tiles[:n]
+
+
+@_jit
+def period_rates(grid, max_period, rates):
+    """
+    Fill rates[px - 1, py - 1] with the fraction of matching cells.
+
+    Same comparison as Tiling.check_periodicity: cells with a negative
+    code are missing and skipped. Shifts that do not fit in the grid, or
+    have no comparable cells, are set to -1.
+    """
+    height, width = grid.shape
+    for px in range(1, max_period + 1):
+        for py in range(1, max_period + 1):
+            rates[px - 1, py - 1] = -1.0
+            if px >= width or py >= height:
+                continue
+            matches = 0
+            total = 0
+            for y in range(height - py):
+                for x in range(width - px):
+                    a = grid[y, x]
+                    b = grid[y + py, x + px]
+                    if a >= 0 and b >= 0:
+                        total += 1
+                        if a == b:
+                            matches += 1
+            if total > 0:
+                rates[px - 1, py - 1] = matches / total
@@ -5,10 +5,92 @@ This implements a basic hash-based commitment scheme. In a real implementation,
 this would use a cryptographically secure commitment scheme.
 """
 
-import hashlib
 import json
+import os
 import secrets
-from typing import Any, Tuple
+import struct
+import threading
+from hashlib import sha256
+from typing import Any, List, Tuple
+
+from .tiling import Point, TILE_INDEX
+
+
+# json.dumps builds a fresh encoder whenever options are passed, so keep one
+_ENCODER = json.JSONEncoder(sort_keys=True, default=str)
+
+
+def _digest(buf: bytes, nonce: str) -> str:
+    """Hex SHA-256 of buf || nonce."""
+    hasher = sha256(buf)
+    hasher.update(b"||")
+    hasher.update(nonce.encode())
+    return hasher.hexdigest()
+
+
+# Filler for the unused leaf slots of a Merkle tree
+_EMPTY_NODE = bytes(32)
+
+
+class _NoncePool:
+    """
+    Random bytes drawn from the OS in large blocks and handed out in
+    small slices, so that each nonce does not cost a syscall.
+    
+    Each byte is handed out once. The buffer is discarded after a fork,
+    since a child must never hand out the same bytes as its parent.
+    """
+    
+    def __init__(self, block_size: int = 4096):
+        self._block_size = block_size
+        self._reset()
+    
+    def _reset(self):
+        """Drop any buffered bytes (and a lock another thread may hold)."""
+        self._lock = threading.Lock()
+        self._buf = b""
+        self._idx = 0
+    
+    def take(self, n: int = 16) -> bytes:
+        """Return n fresh random bytes."""
+        with self._lock:
+            if self._idx + n > len(self._buf):
+                self._buf = secrets.token_bytes(max(self._block_size, n))
+                self._idx = 0
+            start = self._idx
+            self._idx += n
+            return self._buf[start:self._idx]
+
+
+_NONCES = _NoncePool()
+if hasattr(os, "register_at_fork"):  # POSIX only; elsewhere there is no fork
+    os.register_at_fork(after_in_child=_NONCES._reset)
+
+
+# Packed path step: x, y as little-endian int32, tile index as a byte
+_STEP = struct.Struct("<iiB")
+_INT32_MIN, _INT32_MAX = -2**31, 2**31 - 1
+
+
+def _pack_path(path: List[Tuple[Point, str]]) -> bytes:
+    """
+    Serialize a path into the fixed-width binary form it is committed as.
+    
+    Each step is 9 bytes: x and y as little-endian int32, then the
+    index of the tile in TILE_TYPES as an unsigned byte.
+    """
+    return b"".join(_STEP.pack(int(pos.x), int(pos.y), TILE_INDEX[tile])
+                    for pos, tile in path)
+
+
+def _is_packable_step(step: Any) -> bool:
+    """Whether a value is a (Point, tile) step _pack_path can encode exactly."""
+    if not (isinstance(step, tuple) and len(step) == 2):
+        return False
+    pos, tile = step
+    return (isinstance(pos, Point) and isinstance(tile, str) and tile in TILE_INDEX
+            and isinstance(pos.x, int) and _INT32_MIN <= pos.x <= _INT32_MAX
+            and isinstance(pos.y, int) and _INT32_MIN <= pos.y <= _INT32_MAX)
 
 
 class Commitment:
@@ -22,32 +104,65 @@ class Commitment:
     - Binding: Can't find different value with same commitment
     """
     
+    @staticmethod
+    def _serialize(value: Any) -> bytes:
+        """Serialize a value deterministically."""
+        if isinstance(value, str):
+            return value.encode()
+        if isinstance(value, list) and value:
+            if all(isinstance(v, str) for v in value):
+                return Commitment._serialize_vector(value)
+            if all(_is_packable_step(step) for step in value):
+                return _pack_path(value)
+        return _ENCODER.encode(value).encode()
+    
+    @staticmethod
+    def _serialize_vector(values: List[str]) -> bytes:
+        """Serialize strings as a count followed by length-prefixed items."""
+        buf = bytearray(len(values).to_bytes(4, "little"))
+        for v in values:
+            data = v.encode()
+            buf += len(data).to_bytes(4, "little")
+            buf += data
+        return bytes(buf)
+    
     @staticmethod
     def create(value: Any, nonce: str = None) -> Tuple[str, str]:
         """
         Create a commitment to a value.
         
+        Paths of (Point, tile) steps with integer coordinates and known
+        tile types are packed as in _pack_path; other values are JSON
+        serialized.
+        
         Args:
-            value: Value to commit to (will be JSON serialized)
+            value: Value to commit to
             nonce: Random nonce (generated if not provided)
             
         Returns:
             Tuple of (commitment, nonce)
         """
-        if nonce is None:
-            nonce = secrets.token_hex(16)
+        return Commitment.create_bytes(Commitment._serialize(value), nonce)
+    
+    @staticmethod
+    def create_bytes(buf: bytes, nonce: str = None) -> Tuple[str, str]:
+        """
+        Create a commitment to an already serialized value.
         
-        # Serialize value deterministically
-        if isinstance(value, str):
-            serialized = value
-        else:
-            serialized = json.dumps(value, sort_keys=True, default=str)
+        Callers with a compact binary encoding (such as a packed path)
+        can use this to skip JSON serialization entirely.
         
-        # Create commitment
-        data = f"{serialized}||{nonce}"
-        commitment = hashlib.sha256(data.encode()).hexdigest()
+        Args:
+            buf: Serialized value to commit to
+            nonce: Random nonce (generated if not provided)
+            
+        Returns:
+            Tuple of (commitment, nonce)
+        """
+        if nonce is None:
+            nonce = _NONCES.take(16).hex()
         
-        return commitment, nonce
+        return _digest(buf, nonce), nonce
     
     @staticmethod
     def verify(commitment: str, value: Any, nonce: str) -> bool:
@@ -62,8 +177,22 @@ class Commitment:
         Returns:
             True if commitment is valid
         """
-        expected_commitment, _ = Commitment.create(value, nonce)
-        return commitment == expected_commitment
+        return Commitment.verify_bytes(commitment, Commitment._serialize(value), nonce)
+    
+    @staticmethod
+    def verify_bytes(commitment: str, buf: bytes, nonce: str) -> bool:
+        """
+        Verify a commitment opening for an already serialized value.
+        
+        Args:
+            commitment: The commitment to verify
+            buf: The claimed serialized value
+            nonce: The nonce used in commitment
+            
+        Returns:
+            True if commitment is valid
+        """
+        return commitment == _digest(buf, nonce)
     
     @staticmethod
     def create_vector(values: list, nonce: str = None) -> Tuple[str, str]:
@@ -71,6 +200,100 @@ class Commitment:
         Create a commitment to multiple values.
         
         This commits to all values at once, useful for committing
-        to an entire path without revealing individual steps.
+        to an entire path without revealing individual steps. A list
+        of strings is length-prefixed instead of JSON encoded, so it is
+        hashed in a single pass.
         """
         return Commitment.create(values, nonce)
+
+
+class MerkleCommitment:
+    """
+    A Merkle tree commitment to a vector of leaves.
+    
+    Unlike Commitment, individual leaves can be opened with a
+    logarithmic-size authentication path without revealing any other
+    leaf.
+    
+    Leaves are padded to a power of two with zero nodes. The tree is kept
+    as a flat buffer of 2N-1 SHA-256 nodes in heap order: node 0 is the
+    root and node i has children 2i+1 and 2i+2.
+    """
+    
+    @staticmethod
+    def hash_leaf(data: bytes) -> bytes:
+        """Hash leaf data (domain separated from inner nodes)."""
+        return sha256(b"\x00" + data).digest()
+    
+    @staticmethod
+    def _hash_node(left: bytes, right: bytes) -> bytes:
+        """Hash two child nodes into their parent."""
+        return sha256(b"\x01" + left + right).digest()
+    
+    @staticmethod
+    def width(num_leaves: int) -> int:
+        """Number of leaf slots in a tree over num_leaves leaves."""
+        return 1 << max(num_leaves - 1, 0).bit_length()
+    
+    @staticmethod
+    def build(leaves: List[bytes]) -> Tuple[str, bytes]:
+        """
+        Build a tree over leaf hashes.
+        
+        Args:
+            leaves: Leaf hashes, as returned by hash_leaf
+            
+        Returns:
+            Tuple of (root as hex, flat tree buffer)
+        """
+        width = MerkleCommitment.width(len(leaves))
+        nodes = [_EMPTY_NODE] * (2 * width - 1)
+        nodes[width - 1:width - 1 + len(leaves)] = leaves
+        
+        for i in range(width - 2, -1, -1):
+            nodes[i] = MerkleCommitment._hash_node(nodes[2 * i + 1], nodes[2 * i + 2])
+        
+        return nodes[0].hex(), b"".join(nodes)
+    
+    @staticmethod
+    def open(tree: bytes, index: int) -> List[bytes]:
+        """
+        Authentication path for a leaf.
+        
+        Returns:
+            Sibling hashes from the leaf level up to the root
+        """
+        width = (len(tree) // 32 + 1) // 2
+        node = width - 1 + index
+        siblings = []
+        
+        while node > 0:
+            sibling = node + 1 if node % 2 else node - 1
+            siblings.append(tree[32 * sibling:32 * (sibling + 1)])
+            node = (node - 1) // 2
+            
+        return siblings
+    
+    @staticmethod
+    def verify(root: str, leaf: bytes, index: int, siblings: List[bytes]) -> bool:
+        """
+        Verify a leaf opening against a root.
+        
+        Args:
+            root: The committed root (hex)
+            leaf: The claimed leaf hash
+            index: Position of the leaf
+            siblings: Authentication path from open()
+            
+        Returns:
+            True if the leaf is at index in the committed tree
+        """
+        node = leaf
+        for sibling in siblings:
+            if index % 2:
+                node = MerkleCommitment._hash_node(sibling, node)
+            else:
+                node = MerkleCommitment._hash_node(node, sibling)
+            index //= 2
+        
+        return index == 0 and node.hex() == root
@@ -6,29 +6,221 @@ The protocol allows a prover to demonstrate knowledge of a path through
 a tiling without revealing the entire path.
 """
 
+import numbers
+import os
 import secrets
-import random
-from dataclasses import dataclass
-from typing import List, Dict, Tuple
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from hashlib import blake2b, sha256
+from typing import List, Dict, Optional, Tuple
 
-from .tiling import Tiling, Point
-from .commitment import Commitment
+import numpy as np
+
+from . import _tiling_kernels
+from .tiling import (Tiling, Point, TILE_INDEX, TILE_TYPES, _NEIGHBOR_OFFSETS,
+                     grid_to_region)
+from .commitment import MerkleCommitment, _NONCES, _STEP, _pack_path
+
+
+# Paths at least this long use the compiled walk when numba is available
+_JIT_MIN_PATH = 256
+
+# Number of accepted responses each protocol remembers
+_VERIFY_CACHE_SIZE = 4096
+
+# Responses revealing at least this many steps check their tiles with
+# one array compare instead of per-step lookups
+_VECTORIZE_MIN_STEPS = 32
+
+
+def _is_cell_coord(value) -> bool:
+    """Whether a coordinate is an integer, or a finite float equal to one."""
+    if isinstance(value, float):
+        return value.is_integer()
+    return isinstance(value, numbers.Integral)
+
+
+# Integers and lengths in verification cache keys
+_KEY_INT = struct.Struct("<q")
+
+
+def _key_int(value: int) -> bytes:
+    if type(value) is not int:
+        raise TypeError(f"expected int, got {type(value).__name__}")
+    return _KEY_INT.pack(value)
+
+
+def _key_bytes(data: bytes) -> bytes:
+    return _KEY_INT.pack(len(data)) + data
+
+
+def _key_str(value: str) -> bytes:
+    if not isinstance(value, str):
+        raise TypeError(f"expected str, got {type(value).__name__}")
+    return _key_bytes(value.encode())
+
+
+def _pack_for_key(challenge: "Challenge", response: "Response") -> bytes:
+    """
+    Canonical binary form of a challenge and response for the verify cache.
+    
+    Steps are packed as _STEP and strings are length-prefixed, so equal
+    packings always verify identically. Raises for values that have no
+    such form.
+    """
+    parts = [_key_str(challenge.challenge_id), _key_str(challenge.commitment),
+             _key_int(len(challenge.positions))]
+    parts += [_key_int(i) for i in challenge.positions]
+    parts += [_key_str(response.challenge_id), _key_str(response.commitment),
+              _key_int(response.path_length),
+              _key_int(len(response.revealed_steps)),
+              _key_int(len(response.openings))]
+    
+    for pos_idx, pos, tile in response.revealed_steps:
+        parts.append(_key_int(pos_idx))
+        if pos is None and tile is None:
+            parts.append(b"\x00")
+        elif isinstance(pos, Point):
+            parts.append(b"\x01" + _STEP.pack(pos.x, pos.y, TILE_INDEX[tile]))
+        else:
+            raise TypeError(f"expected Point, got {type(pos).__name__}")
+    
+    for opening in response.openings:
+        if opening is None:
+            parts.append(b"\x00")
+            continue
+        leaf_nonce, siblings = opening
+        parts.append(b"\x01" + _key_str(leaf_nonce) + _key_int(len(siblings)))
+        # Siblings are normally 64-char hex digests, which can be joined
+        # without a prefix each
+        if set(map(len, siblings)) <= {64}:
+            parts.append(_key_str("".join(siblings)))
+        else:
+            parts += [_key_str(s) for s in siblings]
+    
+    return b"".join(parts)
+
+
+def _leaf_nonce(nonce: str, index: int) -> bytes:
+    """Per-step nonce, derived from the witness nonce."""
+    return sha256(nonce.encode() + index.to_bytes(4, "little")).digest()[:16]
+
+
+def _step_leaf(step: bytes, leaf_nonce: bytes) -> bytes:
+    """Merkle leaf for one packed path step."""
+    return MerkleCommitment.hash_leaf(step + leaf_nonce)
+
+
+@lru_cache(maxsize=256)
+def _transcript_state(seed: int, size: int, commitment: str):
+    """
+    Fiat-Shamir transcript for an instance and commitment, and a hasher
+    that has already absorbed it. Callers must copy() the hasher.
+    """
+    transcript = sha256(f"{seed}:{size}:{commitment}".encode()).digest()
+    return transcript, sha256(transcript)
 
 
-@dataclass
 class Instance:
-    """Public instance of the tiling problem."""
-    tiles: Dict[Point, str]
-    size: int
-    seed: int
+    """
+    Public instance of the tiling problem.
+    
+    Tiles are stored as a (size, size) int8 array of indices into
+    TILE_TYPES, indexed as tiles_idx[y, x]. The Point-keyed tiles dict
+    is only built if something asks for it.
+    """
+    __slots__ = ("_tiles_idx", "_size", "_seed", "_tiles_dict", "_fingerprint")
+    
+    def __init__(self, tiles_idx: np.ndarray, size: int, seed: int):
+        self._size = size
+        self._seed = seed
+        self.tiles_idx = tiles_idx
+    
+    def __repr__(self):
+        return f"Instance(size={self.size}, seed={self.seed})"
+    
+    def __reduce__(self):
+        return (Instance, (self._tiles_idx, self._size, self._seed))
+    
+    @property
+    def size(self) -> int:
+        """Side length of the grid."""
+        return self._size
+    
+    @property
+    def seed(self) -> int:
+        """Seed of the tiling the instance was cut from."""
+        return self._seed
+    
+    @property
+    def tiles_idx(self) -> np.ndarray:
+        """Tile indices, as a read-only array."""
+        return self._tiles_idx
+    
+    @tiles_idx.setter
+    def tiles_idx(self, tiles_idx: np.ndarray):
+        # A private read-only copy, so that neither the caller nor anyone
+        # holding this array can leave the fingerprint or tiles dict stale
+        tiles_idx = np.array(tiles_idx, dtype=np.int8, copy=True)
+        tiles_idx.flags.writeable = False
+        self._tiles_idx = tiles_idx
+        self._tiles_dict = None
+        self._fingerprint = None
+    
+    @property
+    def tiles(self) -> Dict[Point, str]:
+        """Tiles as a position -> tile type dict, built on first use."""
+        if self._tiles_dict is None:
+            self._tiles_dict = grid_to_region(self.tiles_idx)
+        return self._tiles_dict
+    
+    def fingerprint(self) -> bytes:
+        """Digest of the size, seed and tiles, computed on first use."""
+        if self._fingerprint is None:
+            h = blake2b(digest_size=16)
+            h.update(f"{self.size}:{self.seed}:".encode())
+            h.update(np.ascontiguousarray(self.tiles_idx).tobytes())
+            self._fingerprint = h.digest()
+        return self._fingerprint
+    
+    def contains(self, pos: Point) -> bool:
+        """Check whether a position is a cell of the instance."""
+        return (_is_cell_coord(pos.x) and _is_cell_coord(pos.y)
+                and 0 <= pos.x < self.size and 0 <= pos.y < self.size)
+    
+    def index_at(self, pos: Point) -> int:
+        """Index into TILE_TYPES at a position, or -1 if it is not in the instance."""
+        if not self.contains(pos):
+            return -1
+        return int(self.tiles_idx[int(pos.y), int(pos.x)])
+    
+    def tile_at(self, pos: Point) -> Optional[str]:
+        """Tile type at a position, or None if it is not in the instance."""
+        index = self.index_at(pos)
+        return TILE_TYPES[index] if index >= 0 else None
 
 
-@dataclass
+@dataclass(frozen=True)
 class Witness:
-    """Private witness (path through the tiling)."""
+    """
+    Private witness (path through the tiling).
+    
+    The commitment is the root of a Merkle tree with one leaf per path
+    step. tree holds the flat Merkle tree, so openings need no rehashing.
+    path_length is fixed when the witness is created.
+    """
     path: List[Tuple[Point, str]]
     commitment: str
     nonce: str
+    tree: bytes = field(default=None, repr=False)
+    path_length: int = field(init=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, "path_length", len(self.path))
 
 
 @dataclass
@@ -41,12 +233,19 @@ class Challenge:
 
 @dataclass
 class Response:
-    """Prover's response to challenge."""
+    """
+    Prover's response to challenge.
+    
+    openings[i] authenticates revealed_steps[i] against the commitment as
+    (leaf nonce, sibling hashes), both hex, or is None for steps beyond
+    the path. The witness nonce itself is never revealed.
+    """
     challenge_id: str
     revealed_steps: List[Tuple[int, Point, str]]
     path_length: int
     commitment: str
     nonce: str
+    openings: List[Tuple[str, List[str]]] = field(default_factory=list)
 
 
 class SpectralProtocol:
@@ -65,6 +264,9 @@ class SpectralProtocol:
         """Initialize protocol with optional seed."""
         self.seed = seed if seed is not None else secrets.randbits(32)
         self.tiling = Tiling(self.seed)
+        # Keys of accepted responses, oldest first
+        self._verify_cache: "OrderedDict[bytes, bool]" = OrderedDict()
+        self._verify_lock = threading.Lock()
     
     def create_instance(self, size: int) -> Instance:
         """
@@ -76,12 +278,13 @@ class SpectralProtocol:
         Returns:
             Public instance
         """
-        tiles = self.tiling.generate_region(size, size)
-        return Instance(tiles=tiles, size=size, seed=self.seed)
+        tiles_idx = self.tiling.generate_grid(size, size)
+        return Instance(tiles_idx=tiles_idx, size=size, seed=self.seed)
     
     def generate_witness(self, instance: Instance, 
                         path_length: int,
-                        start: Point = None) -> Witness:
+                        start: Point = None,
+                        rng: np.random.Generator = None) -> Witness:
         """
         Generate a witness (secret path through tiling).
         
@@ -89,23 +292,33 @@ class SpectralProtocol:
             instance: Public tiling instance
             path_length: Length of path to generate
             start: Starting position (random if None)
+            rng: Random generator for the start. Defaults to one seeded
+                from OS entropy; the path is secret, so it must not be
+                derived from the public seed. Pass one only in tests.
             
         Returns:
             Witness containing path and commitment
         """
         # Choose starting position
         if start is None:
-            positions = list(instance.tiles.keys())
-            start = random.choice(positions)
+            if rng is None:
+                rng = np.random.default_rng()
+            x, y = rng.integers(0, instance.size, size=2).tolist()
+            start = Point(x, y)
         
         # Generate path
-        path = self._find_path(instance.tiles, start, path_length)
+        path = self._find_path(instance, start, path_length)
         
-        # Create commitment to path
-        path_data = [(str(pos), tile) for pos, tile in path]
-        commitment, nonce = Commitment.create(path_data)
+        # Commit to each step as a Merkle leaf so steps open individually
+        serialized = _pack_path(path)
+        nonce = _NONCES.take(16).hex()
+        step_size = _STEP.size
+        leaves = [_step_leaf(serialized[i * step_size:(i + 1) * step_size],
+                             _leaf_nonce(nonce, i))
+                  for i in range(len(path))]
+        commitment, tree = MerkleCommitment.build(leaves)
         
-        return Witness(path=path, commitment=commitment, nonce=nonce)
+        return Witness(path=path, commitment=commitment, nonce=nonce, tree=tree)
     
     def create_challenge(self, instance: Instance, 
                         commitment: str,
@@ -113,25 +326,43 @@ class SpectralProtocol:
         """
         Create a verifier challenge.
         
+        Positions are derived from the instance and the commitment with
+        Fiat-Shamir, so the challenge is deterministic and the protocol
+        can run non-interactively.
+        
         Args:
             instance: Public instance
             commitment: Prover's commitment
             num_challenges: Number of positions to challenge
             
         Returns:
-            Challenge with random positions
+            Challenge with distinct pseudo-random positions
         """
-        challenge_id = secrets.token_hex(8)
-        
-        # In a real implementation, these would be derived from
-        # a hash of the commitment for non-interactivity
         max_positions = instance.size * instance.size
-        positions = []
+        num_positions = min(num_challenges, max_positions)
         
-        for _ in range(min(num_challenges, max_positions)):
-            pos = secrets.randbelow(max_positions)
-            if pos not in positions:
-                positions.append(pos)
+        # Transcript state binding the instance and the commitment
+        transcript, state = _transcript_state(instance.seed, instance.size,
+                                              commitment)
+        challenge_id = transcript[:8].hex()
+        
+        # Expand the transcript into uint32 words until enough distinct
+        # positions have been drawn
+        positions = []
+        seen = set()
+        counter = 0
+        while len(positions) < num_positions:
+            hasher = state.copy()
+            hasher.update(counter.to_bytes(4, "little"))
+            block = hasher.digest()
+            counter += 1
+            for word in struct.unpack("<8I", block):
+                pos = word % max_positions
+                if pos not in seen:
+                    seen.add(pos)
+                    positions.append(pos)
+                    if len(positions) == num_positions:
+                        break
         
         return Challenge(
             challenge_id=challenge_id,
@@ -152,90 +383,281 @@ class SpectralProtocol:
             Response revealing requested positions
         """
         revealed_steps = []
+        openings = []
         
         for pos_idx in challenge.positions:
             if pos_idx < len(witness.path):
                 pos, tile = witness.path[pos_idx]
                 revealed_steps.append((pos_idx, pos, tile))
+                openings.append(self._open_step(witness, pos_idx))
             else:
                 revealed_steps.append((pos_idx, None, None))
+                openings.append(None)
         
+        # Only per-step nonces are revealed; the witness nonce would let
+        # the verifier brute-force the hidden steps
         return Response(
             challenge_id=challenge.challenge_id,
             revealed_steps=revealed_steps,
-            path_length=len(witness.path),
+            path_length=witness.path_length,
             commitment=witness.commitment,
-            nonce=witness.nonce
+            nonce="",
+            openings=openings
         )
     
+    @staticmethod
+    def _open_step(witness: Witness, index: int) -> Tuple[str, List[str]]:
+        """Merkle opening for one step, or None without a tree."""
+        if witness.tree is None:
+            return None
+        siblings = MerkleCommitment.open(witness.tree, index)
+        return (_leaf_nonce(witness.nonce, index).hex(),
+                [sibling.hex() for sibling in siblings])
+    
     def verify_response(self, instance: Instance,
                        challenge: Challenge,
                        response: Response) -> bool:
         """
         Verify a response to a challenge.
+        
+        Accepted responses are remembered, so verifying the same
+        response again is a cache lookup. Rejections are never cached.
+        """
+        key = self._verify_key(instance, challenge, response)
+        if key is None:
+            return self._verify_response(instance, challenge, response)
+        with self._verify_lock:
+            if key in self._verify_cache:
+                self._verify_cache.move_to_end(key)
+                return True
+        
+        valid = self._verify_response(instance, challenge, response)
+        if valid:
+            with self._verify_lock:
+                self._verify_cache[key] = True
+                if len(self._verify_cache) > _VERIFY_CACHE_SIZE:
+                    self._verify_cache.popitem(last=False)
+        return valid
+    
+    @staticmethod
+    def _verify_key(instance: Instance, challenge: Challenge,
+                    response: Response) -> Optional[bytes]:
+        """
+        Digest of everything a verification result depends on, or None
+        if the response holds values with no canonical packing. Such
+        responses are verified but never cached.
+        """
+        try:
+            packed = _pack_for_key(challenge, response)
+        except (AttributeError, KeyError, TypeError, ValueError, struct.error):
+            return None
+        return blake2b(instance.fingerprint() + packed, digest_size=16).digest()
+    
+    def _verify_response(self, instance: Instance,
+                         challenge: Challenge,
+                         response: Response) -> bool:
+        """
+        Check a response against its challenge, uncached.
         For every challenge position < path_length, a valid step must be revealed and must match the instance.
         No extra or missing revealed steps for in-bounds challenge positions are allowed.
         All revealed steps for in-bounds challenge positions must match the instance exactly.
+        Each of them must also open against the Merkle root in the commitment.
         """
-        if response.challenge_id != challenge.challenge_id:
+        steps = self._challenged_steps(instance, challenge, response)
+        if steps is None:
             return False
+        depth = MerkleCommitment.width(response.path_length).bit_length() - 1
+        return (self._tiles_match(instance, steps)
+                and self._openings_match(challenge.commitment, depth, steps))
+    
+    def verify_aggregate(self, instance: Instance,
+                         pairs: List[Tuple[Challenge, Response]]) -> bool:
+        """
+        Verify several responses from the same witness together.
+        
+        All responses must carry the same commitment and path length,
+        and a step revealed by more than one response must be revealed
+        identically each time. Each distinct step is then checked
+        against the instance and the Merkle root only once.
+        
+        Args:
+            instance: Public instance
+            pairs: (challenge, response) pairs for one witness
+            
+        Returns:
+            True if every response is valid
+        """
+        if not pairs:
+            return True
+        commitment = pairs[0][1].commitment
+        path_length = pairs[0][1].path_length
+        
+        revealed = {}
+        for challenge, response in pairs:
+            if response.commitment != commitment or response.path_length != path_length:
+                return False
+            steps = self._challenged_steps(instance, challenge, response)
+            if steps is None:
+                return False
+            for step in steps:
+                if revealed.setdefault(step[0], step) != step:
+                    return False
+        
+        steps = list(revealed.values())
+        depth = MerkleCommitment.width(path_length).bit_length() - 1
+        return (self._tiles_match(instance, steps)
+                and self._openings_match(commitment, depth, steps))
+    
+    @staticmethod
+    def _challenged_steps(instance: Instance, challenge: Challenge,
+                          response: Response) -> Optional[List[tuple]]:
+        """
+        Revealed (index, pos, tile, opening) for the in-bounds challenge
+        positions, or None if the response does not fit the challenge.
+        """
+        if response.challenge_id != challenge.challenge_id:
+            return None
         if response.commitment != challenge.commitment:
+            return None
+        try:
+            if response.path_length < 0 or response.path_length > instance.tiles_idx.size:
+                return None
+            if len(response.openings) != len(response.revealed_steps):
+                return None
+            # Build a map for quick lookup
+            revealed_map = {pos_idx: (pos, claimed_tile, opening)
+                            for (pos_idx, pos, claimed_tile), opening
+                            in zip(response.revealed_steps, response.openings)}
+            # In-bounds revealed steps must be exactly the in-bounds challenge positions
+            inbounds = {i for i in challenge.positions if i < response.path_length}
+            if {i for i in revealed_map if i < response.path_length} != inbounds:
+                return None
+        except (TypeError, ValueError):
+            return None
+        return [(pos_idx,) + revealed_map[pos_idx] for pos_idx in inbounds]
+    
+    @staticmethod
+    def _tiles_match(instance: Instance, steps: List[tuple]) -> bool:
+        """Check that every revealed (pos, tile) matches the instance."""
+        # Malformed steps fail on both paths rather than raise
+        if not all(isinstance(pos, Point) and isinstance(claimed_tile, str)
+                   for _, pos, claimed_tile, _ in steps):
             return False
-        # Build a map for quick lookup
-        revealed_map = {pos_idx: (pos, claimed_tile) for pos_idx, pos, claimed_tile in response.revealed_steps}
-        # All in-bounds challenge positions must be present and valid
-        for pos_idx in challenge.positions:
-            if pos_idx < response.path_length:
-                if pos_idx not in revealed_map:
-                    return False
-                pos, claimed_tile = revealed_map[pos_idx]
-                if pos is None or claimed_tile is None:
-                    return False
-                if pos not in instance.tiles:
-                    return False
-                if instance.tiles[pos] != claimed_tile:
-                    return False
-        # No extra revealed steps for in-bounds challenge positions
-        for pos_idx, (pos, claimed_tile) in revealed_map.items():
-            if pos_idx < response.path_length:
-                if pos_idx not in challenge.positions:
-                    return False
-                # Also check that the revealed value matches the instance
-                if pos is None or claimed_tile is None:
-                    return False
-                if pos not in instance.tiles:
-                    return False
-                if instance.tiles[pos] != claimed_tile:
-                    return False
-        if response.path_length < 0 or response.path_length > len(instance.tiles):
+        if len(steps) < _VECTORIZE_MIN_STEPS:
+            return all(claimed_tile in TILE_INDEX
+                       and instance.index_at(pos) == TILE_INDEX[claimed_tile]
+                       for _, pos, claimed_tile, _ in steps)
+        
+        # Non-numeric coordinates become NaN and fail the bounds check
+        real = (int, float, np.integer, np.floating)
+        try:
+            xs = np.fromiter((pos.x if isinstance(pos.x, real) else np.nan
+                              for _, pos, _, _ in steps), np.float64, len(steps))
+            ys = np.fromiter((pos.y if isinstance(pos.y, real) else np.nan
+                              for _, pos, _, _ in steps), np.float64, len(steps))
+            tiles = np.fromiter((TILE_INDEX[claimed_tile] for _, _, claimed_tile, _ in steps),
+                                np.int16, len(steps))
+        except KeyError:
+            return False
+        
+        size = instance.size
+        inside = ((xs >= 0) & (xs < size) & (xs == np.floor(xs))
+                  & (ys >= 0) & (ys < size) & (ys == np.floor(ys)))
+        if not inside.all():
             return False
-        return True
+        found = instance.tiles_idx[ys.astype(np.intp), xs.astype(np.intp)]
+        return bool((found == tiles).all())
+    
+    def _openings_match(self, commitment: str, depth: int,
+                        steps: List[tuple]) -> bool:
+        """Check that every revealed step opens against the commitment."""
+        return all(self._check_opening(commitment, pos_idx, pos, claimed_tile,
+                                       opening, depth)
+                   for pos_idx, pos, claimed_tile, opening in steps)
+    
+    @staticmethod
+    def _check_opening(commitment: str, index: int, pos: Point, tile: str,
+                       opening: Tuple[str, List[str]], depth: int) -> bool:
+        """Check that a revealed step is leaf index of the committed tree."""
+        if opening is None:
+            return False
+        try:
+            leaf_nonce, siblings = opening
+            if len(siblings) != depth:
+                return False
+            step = _STEP.pack(int(pos.x), int(pos.y), TILE_INDEX[tile])
+            leaf = _step_leaf(step, bytes.fromhex(leaf_nonce))
+            return MerkleCommitment.verify(commitment, leaf, index,
+                                           [bytes.fromhex(s) for s in siblings])
+        except (TypeError, ValueError, OverflowError, struct.error):
+            return False
+    
+    def verify_batch(self, items: List[Tuple[Instance, Challenge, Response]],
+                     max_workers: int = None,
+                     use_processes: bool = False) -> List[bool]:
+        """
+        Verify many independent (instance, challenge, response) triples.
+        
+        Args:
+            items: Triples to verify
+            max_workers: Worker count (defaults to the number of CPUs)
+            use_processes: Use a process pool instead of threads. This
+                sidesteps the GIL but pickles every triple, so it only
+                pays off for large batches.
+            
+        Returns:
+            One verification result per triple, in order
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if len(items) <= 1 or max_workers == 1:
+            return [self.verify_response(*item) for item in items]
+        
+        if use_processes:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(_verify_one, items))
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda item: self.verify_response(*item),
+                                     items))
     
-    def _find_path(self, tiles: Dict[Point, str], 
+    def _find_path(self, instance: Instance, 
                    start: Point, length: int) -> List[Tuple[Point, str]]:
         """Find a path through the tiling."""
         path = []
-        current = start
+        if not instance.contains(start):
+            return path
+        
+        size = instance.size
+        tiles_idx = instance.tiles_idx
+        x, y = int(start.x), int(start.y)
+        
+        if _tiling_kernels.HAVE_NUMBA and length >= _JIT_MIN_PATH:
+            xs, ys, tiles = _tiling_kernels.walk(tiles_idx, x, y, length)
+            return [(Point(px, py), TILE_TYPES[t])
+                    for px, py, t in zip(xs.tolist(), ys.tolist(), tiles.tolist())]
+        
         visited = set()
         
         for _ in range(length):
-            if current not in tiles or current in visited:
-                break
-                
-            path.append((current, tiles[current]))
-            visited.add(current)
+            path.append((Point(x, y), TILE_TYPES[tiles_idx[y, x]]))
+            visited.add((x, y))
             
-            # Find unvisited neighbors
-            neighbors = self.tiling.get_neighbors(current)
-            valid_next = [n for n in neighbors 
-                         if n in tiles and n not in visited]
-            
-            if not valid_next:
+            # Move to the smallest unvisited neighbor by (x, y), which
+            # keeps path generation reproducible. The offsets are already
+            # in that order, so the first free one wins.
+            for dx, dy in _NEIGHBOR_OFFSETS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size and (nx, ny) not in visited:
+                    x, y = nx, ny
+                    break
+            else:
                 break
             
-            # Use deterministic selection based on position
-            # This makes path generation reproducible
-            valid_next.sort(key=lambda p: (p.x, p.y))
-            current = valid_next[0]
-            
         return path
+
+
+def _verify_one(item: Tuple[Instance, Challenge, Response]) -> bool:
+    """Verify a single triple in a worker process."""
+    instance, challenge, response = item
+    return SpectralProtocol(instance.seed).verify_response(instance, challenge, response)
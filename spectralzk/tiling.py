@@ -6,26 +6,175 @@ based on position-dependent hashing. The tiles are generated using
 local rules that prevent global periodicity.
 """
 
-import hashlib
-from dataclasses import dataclass
-from typing import List, Dict, Tuple
+import math
+import operator
+import sys
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from . import _tiling_kernels
+
+
+# Tile labels, and the index of each label in the int8 tile arrays
+TILE_TYPES: Tuple[str, ...] = tuple(sys.intern(c) for c in "ABCDEF")
+TILE_INDEX: Dict[str, int] = {tile: i for i, tile in enumerate(TILE_TYPES)}
+
+# Neighbor sets are bitmasks with one bit per tile index
+_AB_MASK = (1 << TILE_INDEX["A"]) | (1 << TILE_INDEX["B"])
+
+# Odd 64-bit multipliers used to fold (seed, x, y) into a single word
+# before it is run through the SplitMix64 finalizer.
+_P1 = 0x9E3779B97F4A7C15
+_P2 = 0xC2B2AE3D27D4EB4F
+_P3 = 0x165667B19E3779F9
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+# Distance to a diagonal neighbor, as Point.distance_to computes it
+_SQRT2 = math.sqrt(2)
+
+# Regions with at least this many cells use the compiled kernel when
+# numba is available; below it the NumPy path is faster than a JIT call.
+_JIT_MIN_CELLS = 64 * 64
+
+# Points cached by Tiling._pt. Larger regions would only churn the cache,
+# so grid_to_region builds their points directly.
+_PT_CACHE_SIZE = 64 * 64
+
+# check_periodicity packs a tile dict into an array only while its
+# bounding box has at most this many cells per tile
+_MAX_BOX_PER_TILE = 4
+
+# The 8 surrounding offsets, ordered by (dx, dy) like the original loop
+_NEIGHBOR_OFFSETS: Tuple[Tuple[int, int], ...] = tuple(
+    (dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)
+)
+
+
+def _splitmix64(z: int) -> int:
+    """SplitMix64 finalizer on a Python int (wraps to 64 bits)."""
+    z &= _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def _apply_rules(base_value: int, mask: int, count: int) -> int:
+    """
+    Local constraint rules on a bitmask of neighbor tile types.
+    
+    Args:
+        base_value: Value from the position hash
+        mask: Bit i set if a neighbor has tile index i
+        count: Number of neighbors
+    """
+    # Simple rule: if surrounded by same type, force different
+    if count >= 3 and mask & (mask - 1) == 0:
+        base_value += 1
+    
+    # Another rule: A and B together suggest C or D
+    if mask & _AB_MASK == _AB_MASK:
+        base_value = base_value % 2 + 2  # Maps to C or D
+    
+    return base_value
+
+
+def _splitmix64_np(z: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer applied elementwise to a uint64 array."""
+    z = z ^ (z >> np.uint64(30))
+    z = z * np.uint64(0xBF58476D1CE4E5B9)
+    z = z ^ (z >> np.uint64(27))
+    z = z * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _coord(value):
+    """Integral coordinates (2.0, np.int64(2), ...) as int, others unchanged."""
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    try:
+        return operator.index(value)
+    except TypeError:
+        return value
+
+
+def _grid_coord(value) -> int:
+    """A coordinate as int, or ValueError if it is not on the integer grid."""
+    value = _coord(value)
+    if not isinstance(value, int):
+        raise ValueError(f"{value!r} is not an integer grid coordinate")
+    return int(value)
 
 
-@dataclass
 class Point:
-    """A 2D point in the tiling space."""
-    x: float
-    y: float
+    """
+    A 2D point on the integer tiling grid.
+    
+    Points are immutable and cache their hash. A point hashes and compares
+    equal to the plain (x, y) tuple, so either can be used as a lookup key.
+    Integral coordinates are stored as int, so Point(2.0, 3.0) is Point(2, 3).
+    """
+    __slots__ = ("x", "y", "_h")
+    
+    def __init__(self, x: int, y: int):
+        if type(x) is not int:
+            x = _coord(x)
+        if type(y) is not int:
+            y = _coord(y)
+        _set_x(self, x)
+        _set_y(self, y)
+        _set_h(self, hash((x, y)))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"cannot assign to field '{name}'")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"cannot delete field '{name}'")
+    
+    def __repr__(self):
+        return f"Point(x={self.x!r}, y={self.y!r})"
     
     def __hash__(self):
-        return hash((self.x, self.y))
+        return self._h
     
     def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
+        if isinstance(other, Point):
+            return self._h == other._h and self.x == other.x and self.y == other.y
+        if isinstance(other, tuple):
+            return len(other) == 2 and self.x == other[0] and self.y == other[1]
+        return NotImplemented
+    
+    def __reduce__(self):
+        return (Point, (self.x, self.y))
     
     def distance_to(self, other: 'Point') -> float:
         """Euclidean distance to another point."""
-        return ((self.x - other.x)**2 + (self.y - other.y)**2)**0.5
+        dx = self.x - other.x
+        dy = self.y - other.y
+        # Exact for integer points: the sum of squares is an exact int
+        return math.sqrt(dx * dx + dy * dy)
+
+
+# Slot setters that bypass Point.__setattr__, which only guards against
+# mutation after construction. Much cheaper than object.__setattr__.
+_set_x = Point.x.__set__
+_set_y = Point.y.__set__
+_set_h = Point._h.__set__
+
+
+def grid_to_region(indices: np.ndarray,
+                   origin: Point = None) -> Dict[Point, str]:
+    """
+    Convert an index array from Tiling.generate_grid into a tile dict.
+    
+    Keys are inserted in reading order, starting from origin.
+    """
+    ox, oy = (0, 0) if origin is None else (_grid_coord(origin.x), _grid_coord(origin.y))
+    point = Tiling._pt if indices.size <= _PT_CACHE_SIZE else Point
+    return {point(ox + x, oy + y): TILE_TYPES[i]
+            for y, row in enumerate(indices.tolist())
+            for x, i in enumerate(row)}
 
 
 class Tiling:
@@ -38,17 +187,43 @@ class Tiling:
     3. Local structure (neighboring tiles influence each other)
     """
     
-    TILE_TYPES = ["A", "B", "C", "D", "E", "F"]
+    TILE_TYPES = TILE_TYPES
+    _NEIGHBOR_OFFSETS = _NEIGHBOR_OFFSETS
+    
+    @staticmethod
+    @lru_cache(maxsize=_PT_CACHE_SIZE)
+    def _pt(x: int, y: int) -> Point:
+        """Shared Point for a grid cell, so regions reuse point objects."""
+        return Point(x, y)
     
     def __init__(self, seed: int = 0):
         """Initialize with a seed that affects the tiling pattern."""
         self.seed = seed
     
-    def _hash_position(self, x: float, y: float) -> str:
-        """Create a hash from a position."""
+    @property
+    def seed(self) -> int:
+        """Seed of the tiling pattern."""
+        return self._seed
+    
+    @seed.setter
+    def seed(self, seed: int):
+        self._seed = seed
+        # The seed's contribution to every position hash, folded once
+        self._seed_key = (seed * _P1) & _MASK64
+    
+    def _hash_position(self, x: int, y: int) -> int:
+        """Create a 64-bit hash from a grid position."""
+        if type(x) is not int or type(y) is not int:
+            x, y = _grid_coord(x), _grid_coord(y)
         # Include seed to allow different tiling patterns
-        data = f"{self.seed}:{x:.3f},{y:.3f}"
-        return hashlib.md5(data.encode()).hexdigest()
+        return _splitmix64(self._seed_key ^ (x * _P2) ^ (y * _P3))
+    
+    def _hash_grid(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Vectorized _hash_position over broadcastable coordinate arrays."""
+        z = (np.uint64(self._seed_key)
+             ^ (xs.astype(np.uint64) * np.uint64(_P2))
+             ^ (ys.astype(np.uint64) * np.uint64(_P3)))
+        return _splitmix64_np(z)
     
     def get_tile_type(self, pos: Point, neighbors: List[str] = None) -> str:
         """
@@ -61,37 +236,44 @@ class Tiling:
         Returns:
             Tile type as a string (A, B, C, etc.)
         """
-        # Base tile from position hash
-        pos_hash = self._hash_position(pos.x, pos.y)
-        base_value = int(pos_hash[:8], 16)
-        
-        # Apply local constraints if neighbors provided
+        return self._adjust_for_neighbors(self._base_type(pos), neighbors)
+    
+    def _base_type(self, pos: Point) -> int:
+        """Neighbor-free tile value of a position: its low 32 hash bits."""
+        return self._hash_position(pos.x, pos.y) & 0xFFFFFFFF
+    
+    def _adjust_for_neighbors(self, base_value: int,
+                              neighbors: List[str] = None) -> str:
+        """Apply the local constraints to a base value and pick its type."""
         if neighbors:
-            # Simple rule: if surrounded by same type, force different
-            if len(neighbors) >= 3 and all(n == neighbors[0] for n in neighbors):
-                base_value += 1
-            
-            # Another rule: A and B together suggest C or D
-            if "A" in neighbors and "B" in neighbors:
-                base_value = base_value % 2 + 2  # Maps to C or D
+            mask = 0
+            unknown = None
+            for n in neighbors:
+                index = TILE_INDEX.get(n)
+                if index is None:
+                    # Other labels get their own bits past the known types
+                    if unknown is None:
+                        unknown = {}
+                    index = unknown.setdefault(n, len(TILE_TYPES) + len(unknown))
+                mask |= 1 << index
+            base_value = _apply_rules(base_value, mask, len(neighbors))
         
         return self.TILE_TYPES[base_value % len(self.TILE_TYPES)]
     
     def get_neighbors(self, center: Point, radius: float = 1.5) -> List[Point]:
-        """Get positions of neighboring tiles."""
-        neighbors = []
+        """
+        Get positions of neighboring tiles.
         
-        # Check 8 surrounding positions
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue
-                    
-                neighbor = Point(center.x + dx, center.y + dy)
-                if center.distance_to(neighbor) <= radius:
-                    neighbors.append(neighbor)
-                    
-        return neighbors
+        Any radius >= sqrt(2) covers all 8 surrounding positions, which
+        is the common case and skips the distance checks entirely.
+        """
+        if radius >= _SQRT2:
+            offsets = self._NEIGHBOR_OFFSETS
+        else:
+            offsets = [(dx, dy) for dx, dy in self._NEIGHBOR_OFFSETS
+                       if math.sqrt(dx * dx + dy * dy) <= radius]
+        
+        return [Point(center.x + dx, center.y + dy) for dx, dy in offsets]
     
     def generate_region(self, width: int, height: int, 
                        origin: Point = None) -> Dict[Point, str]:
@@ -108,35 +290,135 @@ class Tiling:
         """
         if origin is None:
             origin = Point(0, 0)
-            
-        tiles = {}
         
-        # Generate in reading order to allow neighbor influence
-        for y in range(height):
-            for x in range(width):
-                pos = Point(origin.x + x, origin.y + y)
-                
-                # Get already-placed neighbors
-                neighbors = self.get_neighbors(pos)
-                neighbor_types = []
-                
-                for n in neighbors:
-                    if n in tiles:
-                        neighbor_types.append(tiles[n])
-                
-                # Determine tile type
-                tile_type = self.get_tile_type(pos, neighbor_types)
-                tiles[pos] = tile_type
-                
-        return tiles
+        return grid_to_region(self.generate_grid(width, height, origin), origin)
+    
+    def generate_grid(self, width: int, height: int,
+                      origin: Point = None) -> np.ndarray:
+        """
+        Generate a rectangular region as an array of tile indices.
+        
+        This is the array form of generate_region; cell [y, x] holds the
+        index into TILE_TYPES of the tile at (origin.x + x, origin.y + y).
+        
+        Returns:
+            (height, width) int8 array
+        """
+        if origin is None:
+            origin = Point(0, 0)
+        
+        if _tiling_kernels.HAVE_NUMBA and width * height >= _JIT_MIN_CELLS:
+            return _tiling_kernels.fill_region(
+                np.uint64(self._seed_key), _grid_coord(origin.x), _grid_coord(origin.y),
+                width, height, len(self.TILE_TYPES))
+        
+        return self._region_indices(width, height, origin)
+    
+    def _region_indices(self, width: int, height: int,
+                        origin: Point) -> np.ndarray:
+        """
+        Compute tile indices for a region in one vectorized pass.
+        
+        Every cell is hashed at once, then the local constraints of
+        get_tile_type are applied using the neighbors that precede the
+        cell in reading order (NW, N, NE, W), read from the unadjusted
+        base grid so that no cell depends on another cell's adjustment.
+        
+        Returns:
+            (height, width) int8 array of indices into TILE_TYPES
+        """
+        xs = np.arange(width, dtype=np.int64) + _grid_coord(origin.x)
+        ys = np.arange(height, dtype=np.int64) + _grid_coord(origin.y)
+        hashes = self._hash_grid(xs[np.newaxis, :], ys[:, np.newaxis])
+        base_value = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        
+        num_types = len(self.TILE_TYPES)
+        base_type = base_value % num_types
+        
+        # Pad with -1 so out-of-region neighbors are simply absent
+        padded = np.full((height + 1, width + 2), -1, dtype=np.int64)
+        padded[1:, 1:-1] = base_type
+        neighbors = np.stack([
+            padded[:-1, :-2],   # NW
+            padded[:-1, 1:-1],  # N
+            padded[:-1, 2:],    # NE
+            padded[1:, :-2],    # W
+        ])
+        present = neighbors >= 0
+        count = present.sum(axis=0)
+        
+        # One bit per tile type seen among the neighbors
+        type_bits = np.where(present, np.left_shift(1, np.maximum(neighbors, 0)), 0)
+        mask = np.bitwise_or.reduce(type_bits, axis=0)
+        
+        # Surrounded by a single type: force a different one
+        all_same = (count >= 3) & ((mask & (mask - 1)) == 0)
+        base_value = base_value + all_same
+        
+        # A and B together map to C or D
+        a_and_b = (mask & _AB_MASK) == _AB_MASK
+        base_value = np.where(a_and_b, base_value % 2 + 2, base_value)
+        
+        return (base_value % num_types).astype(np.int8)
     
-    def check_periodicity(self, tiles: Dict[Point, str], 
+    def check_periodicity(self, tiles, 
                          max_period: int = 5) -> Dict[Tuple[int, int], float]:
         """
         Check for periodic patterns in a tiling.
         
+        Args:
+            tiles: Tile dict, or an index array as returned by generate_grid
+            max_period: Largest shift to test in each direction
+        
         Returns dictionary of (period_x, period_y) -> match_percentage
         """
+        if isinstance(tiles, np.ndarray):
+            grid = tiles
+            present = None
+        else:
+            grid = self._region_to_array(tiles)
+            if grid is None:
+                return self._periodicity_by_key(tiles, max_period)
+            present = grid >= 0
+        
+        height, width = grid.shape
+        results = {}
+        
+        # Masking missing cells costs NumPy three extra passes per shift;
+        # the kernel checks them inline. Dense index arrays are faster
+        # with the plain NumPy compare below.
+        if (present is not None and _tiling_kernels.HAVE_NUMBA
+                and grid.size >= _JIT_MIN_CELLS):
+            rates = np.empty((max_period, max_period), dtype=np.float64)
+            _tiling_kernels.period_rates(grid, max_period, rates)
+            for (px, py), rate in np.ndenumerate(rates):
+                if rate >= 0:
+                    results[(px + 1, py + 1)] = float(rate)
+            return results
+        
+        for px in range(1, max_period + 1):
+            for py in range(1, max_period + 1):
+                if px >= width or py >= height:
+                    continue
+                
+                # Compare every cell with the cell shifted by (px, py)
+                matches = grid[:height - py, :width - px] == grid[py:, px:]
+                if present is None:
+                    total = matches.size
+                else:
+                    both = present[:height - py, :width - px] & present[py:, px:]
+                    matches &= both
+                    total = int(np.count_nonzero(both))
+                
+                if total > 0:
+                    results[(px, py)] = int(np.count_nonzero(matches)) / total
+                    
+        return results
+    
+    @staticmethod
+    def _periodicity_by_key(tiles: Dict[Point, str],
+                            max_period: int) -> Dict[Tuple[int, int], float]:
+        """check_periodicity for tile dicts that do not pack into an array."""
         results = {}
         
         for px in range(1, max_period + 1):
@@ -145,7 +427,8 @@ class Tiling:
                 total = 0
                 
                 for pos, tile_type in tiles.items():
-                    shifted = Point(pos.x + px, pos.y + py)
+                    # Points hash like tuples, so no Point is built per lookup
+                    shifted = (pos.x + px, pos.y + py)
                     if shifted in tiles:
                         total += 1
                         if tiles[shifted] == tile_type:
@@ -153,37 +436,79 @@ class Tiling:
                 
                 if total > 0:
                     results[(px, py)] = matches / total
-                    
+        
         return results
     
+    @staticmethod
+    def _region_to_array(tiles: Dict[Point, str]) -> Optional[np.ndarray]:
+        """
+        Pack a tile dict into a dense array of per-type codes.
+        
+        Cells missing from the dict are -1. Codes are assigned in order
+        of first appearance, so arbitrary tile labels are supported.
+        Returns None if a position is off the integer grid, or if the
+        bounding box is so sparse that the array would dwarf the dict.
+        """
+        if not tiles:
+            return np.full((0, 0), -1, dtype=np.int16)
+        if not all(type(pos.x) is int and type(pos.y) is int for pos in tiles):
+            return None
+        
+        try:
+            xs = np.fromiter((pos.x for pos in tiles), dtype=np.int64, count=len(tiles))
+            ys = np.fromiter((pos.y for pos in tiles), dtype=np.int64, count=len(tiles))
+        except OverflowError:
+            return None
+        x0, y0 = int(xs.min()), int(ys.min())
+        height, width = int(ys.max()) - y0 + 1, int(xs.max()) - x0 + 1
+        if height * width > _MAX_BOX_PER_TILE * len(tiles):
+            return None
+        
+        labels = {}
+        codes = np.fromiter(
+            (labels.setdefault(t, len(labels)) for t in tiles.values()),
+            dtype=np.int16, count=len(tiles))
+        grid = np.full((height, width), -1, dtype=np.int16)
+        grid[ys - y0, xs - x0] = codes
+        return grid
+    
     def find_path(self, tiles: Dict[Point, str], 
-                  start: Point, length: int) -> List[Tuple[Point, str]]:
+                  start: Point, length: int,
+                  rng: np.random.Generator = None) -> List[Tuple[Point, str]]:
         """
         Find a path through the tiling (for witness generation).
         
         This is a simple random walk - in a real implementation,
         this might involve more sophisticated pathfinding.
+        
+        Args:
+            tiles: Tiling region to walk in
+            start: Starting position
+            length: Maximum number of steps
+            rng: Random generator (a fresh unseeded one if not provided)
         """
-        import random
+        if rng is None:
+            rng = np.random.default_rng()
         
         path = []
         current = start
         
         if current not in tiles:
             return path
-            
+        
+        offsets = self._NEIGHBOR_OFFSETS
         for _ in range(length):
             path.append((current, tiles[current]))
             
             # Find valid next positions
-            neighbors = self.get_neighbors(current)
-            valid_next = [n for n in neighbors if n in tiles]
+            cx, cy = current.x, current.y
+            valid_next = [n for n in (Point(cx + dx, cy + dy) for dx, dy in offsets)
+                          if n in tiles]
             
             if not valid_next:
                 break
                 
             # Choose next position
-            # In real implementation, this might use the seed
-            current = random.choice(valid_next)
+            current = valid_next[rng.integers(len(valid_next))]
             
         return path
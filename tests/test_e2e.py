@@ -4,6 +4,8 @@ End-to-end tests for the complete SpectralZK protocol.
 
 import unittest
 import time
+from dataclasses import replace
+from unittest import mock
 from spectralzk import SpectralProtocol, Point
 
 
@@ -36,14 +38,49 @@ class TestEndToEnd(unittest.TestCase):
         """Test multiple challenges on same witness."""
         protocol = SpectralProtocol(seed=123)
         instance = protocol.create_instance(size=5)
-        witness = protocol.generate_witness(instance, path_length=8)
-        
-        # Multiple challenges should all verify
-        for i in range(3):
-            challenge = protocol.create_challenge(instance, witness.commitment, 2)
+        witness = protocol.generate_witness(instance, path_length=8, start=Point(0, 0))
+        
+        # Challenges on one commitment share their Fiat-Shamir positions,
+        # so use distinct, overlapping position sets (20 is past the path)
+        pairs = []
+        for i, positions in enumerate([[0, 1, 2], [2, 3, 4], [4, 5, 20]]):
+            challenge = protocol.create_challenge(instance, witness.commitment, 3)
+            challenge.positions = positions
             response = protocol.respond_to_challenge(witness, challenge)
             is_valid = protocol.verify_response(instance, challenge, response)
             self.assertTrue(is_valid, f"Challenge {i} failed")
+            pairs.append((challenge, response))
+        
+        # Verified together, each distinct step is opened once
+        with mock.patch.object(SpectralProtocol, "_check_opening",
+                               wraps=SpectralProtocol._check_opening) as check:
+            self.assertTrue(protocol.verify_aggregate(instance, pairs))
+        self.assertEqual(sorted(c.args[1] for c in check.call_args_list),
+                         [0, 1, 2, 3, 4, 5])
+        
+        # One bad response fails the whole aggregate
+        challenge, response = pairs[1]
+        steps = list(response.revealed_steps)
+        pos_idx, pos, tile = steps[1]
+        steps[1] = (pos_idx, pos, "A" if tile != "A" else "B")
+        bad = (challenge, replace(response, revealed_steps=steps))
+        self.assertFalse(protocol.verify_aggregate(instance, [pairs[0], bad, pairs[2]]))
+        
+        # So does a step revealed differently by two responses
+        steps = list(pairs[0][1].revealed_steps)
+        pos_idx, pos, tile = steps[2]
+        self.assertEqual(pos_idx, 2)
+        steps[2] = (pos_idx, Point(pos.x + 1, pos.y), tile)
+        conflicting = (pairs[0][0], replace(pairs[0][1], revealed_steps=steps))
+        with mock.patch.object(SpectralProtocol, "_check_opening") as check:
+            self.assertFalse(protocol.verify_aggregate(instance, [conflicting, pairs[1]]))
+        check.assert_not_called()
+        
+        # Responses from different witnesses do not aggregate
+        other = protocol.generate_witness(instance, path_length=8)
+        challenge = protocol.create_challenge(instance, other.commitment, 2)
+        pairs.append((challenge, protocol.respond_to_challenge(other, challenge)))
+        self.assertFalse(protocol.verify_aggregate(instance, pairs))
     
     def test_different_sized_instances(self):
         """Test protocol with different instance sizes."""
@@ -81,6 +118,26 @@ class TestEndToEnd(unittest.TestCase):
         self.assertGreaterEqual(success_rate, 0.9, 
                                f"Success rate too low: {success_rate:.0%}")
     
+    def test_batch_verification(self):
+        """Test verifying several transcripts at once."""
+        protocol = SpectralProtocol(seed=7)
+        items = []
+        for size in [4, 5, 6]:
+            instance = protocol.create_instance(size=size)
+            witness = protocol.generate_witness(instance, 6, Point(0, 0))
+            challenge = protocol.create_challenge(instance, witness.commitment, 3)
+            challenge.positions = [0, 1]
+            response = protocol.respond_to_challenge(witness, challenge)
+            items.append((instance, challenge, response))
+        
+        # Tamper with the middle transcript
+        items[1][2].challenge_id = "wrong_id"
+        expected = [True, False, True]
+        
+        self.assertEqual(protocol.verify_batch(items), expected)
+        self.assertEqual(protocol.verify_batch(items, max_workers=2,
+                                               use_processes=True), expected)
+    
     def test_performance(self):
         """Test protocol performance."""
         protocol = SpectralProtocol(seed=999)
@@ -2,8 +2,15 @@
 Tests for the protocol module.
 """
 
+import dataclasses
+import pickle
 import unittest
-from spectralzk import SpectralProtocol, Point, Commitment
+from unittest import mock
+
+import numpy as np
+
+from spectralzk import SpectralProtocol, Instance, Point, Commitment, MerkleCommitment, TILE_TYPES
+from spectralzk import _tiling_kernels
 
 
 class TestProtocol(unittest.TestCase):
@@ -21,6 +28,25 @@ class TestProtocol(unittest.TestCase):
         self.assertEqual(len(instance.tiles), 25)
         self.assertEqual(instance.seed, 42)
     
+    def test_instance_array_layout(self):
+        """Test that the tile array and the tile dict agree."""
+        instance = self.protocol.create_instance(size=4)
+        
+        self.assertEqual(instance.tiles_idx.shape, (4, 4))
+        self.assertIsNone(instance._tiles_dict)
+        for pos, tile in instance.tiles.items():
+            self.assertTrue(instance.contains(pos))
+            self.assertEqual(instance.tile_at(pos), tile)
+        self.assertFalse(instance.contains(Point(4, 0)))
+        self.assertIsNone(instance.tile_at(Point(4, 0)))
+        self.assertEqual(instance.index_at(Point(0, 4)), -1)
+        self.assertFalse(instance.contains(Point(0.5, 0)))
+        for bad in (float("nan"), float("inf"), float("-inf"), "a", "1", None):
+            with self.subTest(coord=bad):
+                self.assertFalse(instance.contains(Point(bad, 0)))
+                self.assertFalse(instance.contains(Point(0, bad)))
+                self.assertIsNone(instance.tile_at(Point(bad, 0)))
+    
     def test_witness_generation(self):
         """Test witness generation."""
         instance = self.protocol.create_instance(size=5)
@@ -28,6 +54,7 @@ class TestProtocol(unittest.TestCase):
         
         # Check structure
         self.assertLessEqual(len(witness.path), 8)
+        self.assertEqual(witness.path_length, len(witness.path))
         self.assertEqual(len(witness.commitment), 64)
         self.assertEqual(len(witness.nonce), 32)
         
@@ -36,6 +63,22 @@ class TestProtocol(unittest.TestCase):
             self.assertIn(pos, instance.tiles)
             self.assertEqual(instance.tiles[pos], tile)
     
+    def test_witness_commitment_opens(self):
+        """Test that every path step opens against the Merkle root."""
+        from spectralzk.protocol import _pack_path, _leaf_nonce, _step_leaf
+        instance = self.protocol.create_instance(size=5)
+        witness = self.protocol.generate_witness(instance, 8, Point(0, 0))
+        
+        buf = _pack_path(witness.path)
+        self.assertEqual(len(buf), 9 * len(witness.path))
+        
+        for i in range(len(witness.path)):
+            leaf = _step_leaf(buf[9 * i:9 * (i + 1)], _leaf_nonce(witness.nonce, i))
+            siblings = MerkleCommitment.open(witness.tree, i)
+            self.assertEqual(len(siblings), 3)
+            self.assertTrue(MerkleCommitment.verify(witness.commitment, leaf, i, siblings))
+            self.assertFalse(MerkleCommitment.verify(witness.commitment, leaf, i ^ 1, siblings))
+    
     def test_deterministic_witness(self):
         """Test that witness generation is deterministic with fixed start."""
         instance = self.protocol.create_instance(size=5)
@@ -50,6 +93,31 @@ class TestProtocol(unittest.TestCase):
             self.assertEqual(p1, p2)
             self.assertEqual(t1, t2)
     
+    @unittest.skipUnless(_tiling_kernels.HAVE_NUMBA, "numba not installed")
+    def test_compiled_walk_matches_python(self):
+        """Test that the numba path walk agrees with the Python one."""
+        instance = self.protocol.create_instance(size=12)
+        start = Point(5, 7)
+        
+        with mock.patch("spectralzk.protocol._JIT_MIN_PATH", 1):
+            compiled = self.protocol.generate_witness(instance, 60, start)
+        with mock.patch("spectralzk.protocol._JIT_MIN_PATH", 10**9):
+            interpreted = self.protocol.generate_witness(instance, 60, start)
+        
+        self.assertEqual(compiled.path, interpreted.path)
+    
+    def test_witness_start_rng(self):
+        """Test that only an explicit rng makes random starts reproducible."""
+        instance = self.protocol.create_instance(size=6)
+        witness1 = self.protocol.generate_witness(instance, 5, rng=np.random.default_rng(7))
+        witness2 = self.protocol.generate_witness(instance, 5, rng=np.random.default_rng(7))
+        self.assertEqual(witness1.path, witness2.path)
+        
+        # The start is not derived from the public seed
+        starts = {SpectralProtocol(seed=42).generate_witness(instance, 1).path[0][0]
+                  for _ in range(20)}
+        self.assertGreater(len(starts), 1)
+    
     def test_challenge_creation(self):
         """Test challenge creation."""
         instance = self.protocol.create_instance(size=4)
@@ -67,6 +135,23 @@ class TestProtocol(unittest.TestCase):
             self.assertGreaterEqual(pos, 0)
             self.assertLess(pos, 16)
     
+    def test_challenge_is_deterministic(self):
+        """Test Fiat-Shamir derivation of challenge positions."""
+        instance = self.protocol.create_instance(size=4)
+        
+        c1 = self.protocol.create_challenge(instance, "commitment_a", 5)
+        c2 = self.protocol.create_challenge(instance, "commitment_a", 5)
+        c3 = self.protocol.create_challenge(instance, "commitment_b", 5)
+        
+        self.assertEqual(c1.challenge_id, c2.challenge_id)
+        self.assertEqual(c1.positions, c2.positions)
+        self.assertNotEqual(c1.challenge_id, c3.challenge_id)
+        
+        # Positions are distinct, and capped by the number of cells
+        self.assertEqual(len(set(c1.positions)), 5)
+        everything = self.protocol.create_challenge(instance, "commitment_a", 100)
+        self.assertEqual(everything.positions, list(range(16)))
+    
     def test_response_generation(self):
         """Test response generation."""
         instance = self.protocol.create_instance(size=4)
@@ -95,11 +180,92 @@ class TestProtocol(unittest.TestCase):
         is_valid = self.protocol.verify_response(instance, challenge, response)
         self.assertTrue(is_valid)
     
+    def test_verification_cache(self):
+        """Test that only accepted responses are cached."""
+        instance = self.protocol.create_instance(size=5)
+        witness = self.protocol.generate_witness(instance, 10)
+        challenge = self.protocol.create_challenge(instance, witness.commitment, 4)
+        challenge.positions = [0, 1, 2]
+        response = self.protocol.respond_to_challenge(witness, challenge)
+        
+        self.assertTrue(self.protocol.verify_response(instance, challenge, response))
+        self.assertTrue(self.protocol.verify_response(instance, challenge, response))
+        self.assertEqual(len(self.protocol._verify_cache), 1)
+        
+        # Tiles cannot change underneath a cached result
+        with self.assertRaises(ValueError):
+            instance.tiles_idx[0, 0] = 0
+        original = instance.tiles_idx
+        instance.tiles_idx = (original + 1) % len(TILE_TYPES)
+        self.assertFalse(self.protocol.verify_response(instance, challenge, response))
+        instance.tiles_idx = original
+        with self.assertRaises(AttributeError):
+            instance.size = 4
+        with self.assertRaises(AttributeError):
+            instance.seed = 0
+        
+        # The instance keeps its own copy of the caller's array
+        tiles_idx = np.array(instance.tiles_idx)
+        copied = Instance(tiles_idx, instance.size, instance.seed)
+        self.assertTrue(self.protocol.verify_response(copied, challenge, response))
+        tiles_idx[:] = (tiles_idx + 1) % len(TILE_TYPES)
+        self.assertTrue(self.protocol.verify_response(copied, challenge, response))
+        self.assertTrue(self.protocol._verify_response(copied, challenge, response))
+        self.assertEqual(pickle.loads(pickle.dumps(copied)).fingerprint(),
+                         copied.fingerprint())
+        
+        pos_idx, pos, tile = response.revealed_steps[0]
+        wrong = TILE_TYPES[(TILE_TYPES.index(tile) + 1) % len(TILE_TYPES)]
+        response.revealed_steps[0] = (pos_idx, pos, wrong)
+        self.assertFalse(self.protocol.verify_response(instance, challenge, response))
+        
+        # Steps with no canonical packing are verified uncached
+        response.revealed_steps[0] = (pos_idx, Point(float("nan"), 0), tile)
+        self.assertFalse(self.protocol.verify_response(instance, challenge, response))
+        self.assertEqual(len(self.protocol._verify_cache), 1)
+    
+    def test_vectorized_tile_check(self):
+        """Test that the array tile check agrees with per-step lookups."""
+        instance = self.protocol.create_instance(size=6)
+        witness = self.protocol.generate_witness(instance, 30, Point(0, 0))
+        steps = [(i, pos, tile, None) for i, (pos, tile) in enumerate(witness.path)]
+        bad_steps = [
+            steps[:1] + [(1, Point(0.5, 0), steps[1][2], None)],
+            steps[:1] + [(1, Point("1", 0), steps[1][2], None)],
+            steps[:1] + [(1, Point("a", 0), steps[1][2], None)],
+            steps[:1] + [(1, Point(float("nan"), 0), steps[1][2], None)],
+            steps[:1] + [(1, Point(float("inf"), 0), steps[1][2], None)],
+            steps[:1] + [(1, Point(6, 0), steps[1][2], None)],
+            steps[:1] + [(1, None, steps[1][2], None)],
+            steps[:1] + [(1, steps[1][1], "X", None)],
+            steps[:1] + [(1, (1, 0), steps[1][2], None)],
+            steps[:1] + [(1, steps[1][1], [steps[1][2]], None)],
+        ]
+        
+        challenge = self.protocol.create_challenge(instance, witness.commitment, 4)
+        challenge.positions = [0, 1]
+        response = self.protocol.respond_to_challenge(witness, challenge)
+        pos_idx, pos, tile = response.revealed_steps[1]
+        bad_revealed = [(pos_idx, (pos.x, pos.y), tile), (pos_idx, pos, [tile]),
+                        (pos_idx, pos), ([pos_idx], pos, tile)]
+        
+        for min_steps in (0, 10**9):
+            with mock.patch("spectralzk.protocol._VECTORIZE_MIN_STEPS", min_steps):
+                self.assertTrue(self.protocol._tiles_match(instance, steps))
+                for bad in bad_steps:
+                    self.assertFalse(self.protocol._tiles_match(instance, bad))
+                for bad in bad_revealed:
+                    tampered = dataclasses.replace(
+                        response, revealed_steps=response.revealed_steps[:1] + [bad])
+                    self.assertFalse(self.protocol.verify_response(instance, challenge, tampered))
+    
     def test_invalid_verification(self):
         """Test rejection of invalid responses."""
         instance = self.protocol.create_instance(size=5)
         witness = self.protocol.generate_witness(instance, 10)
         challenge = self.protocol.create_challenge(instance, witness.commitment, 3)
+        # Make sure at least one challenged step lies on the path
+        challenge.positions = sorted(set(challenge.positions) | {0})
         response = self.protocol.respond_to_challenge(witness, challenge)
         
         # Test wrong challenge ID
@@ -117,10 +283,64 @@ class TestProtocol(unittest.TestCase):
         if response.revealed_steps:
             original_steps = response.revealed_steps
             pos_idx, pos, tile = response.revealed_steps[0]
+            self.assertIsNotNone(pos)
             response.revealed_steps = [(pos_idx, pos, "X")] + original_steps[1:]
             self.assertFalse(self.protocol.verify_response(instance, challenge, response))
             response.revealed_steps = original_steps
     
+    def test_revealed_steps_must_match_challenge(self):
+        """Test rejection of extra or missing revealed steps."""
+        instance = self.protocol.create_instance(size=5)
+        witness = self.protocol.generate_witness(instance, 6, Point(0, 0))
+        challenge = self.protocol.create_challenge(instance, witness.commitment, 2)
+        challenge.positions = [0, 2]
+        response = self.protocol.respond_to_challenge(witness, challenge)
+        self.assertTrue(self.protocol.verify_response(instance, challenge, response))
+        
+        # An honest but unrequested step is still rejected
+        pos, tile = witness.path[1]
+        original_steps = response.revealed_steps
+        original_openings = response.openings
+        response.revealed_steps = original_steps + [(1, pos, tile)]
+        response.openings = original_openings + [self.protocol._open_step(witness, 1)]
+        self.assertFalse(self.protocol.verify_response(instance, challenge, response))
+        
+        # So is leaving out a requested step
+        response.revealed_steps = original_steps[:1]
+        response.openings = original_openings[:1]
+        self.assertFalse(self.protocol.verify_response(instance, challenge, response))
+    
+    def test_opening_must_match_commitment(self):
+        """Test that revealed steps are bound to the committed path."""
+        instance = self.protocol.create_instance(size=5)
+        witness = self.protocol.generate_witness(instance, 6, Point(0, 0))
+        challenge = self.protocol.create_challenge(instance, witness.commitment, 2)
+        challenge.positions = [0, 2]
+        response = self.protocol.respond_to_challenge(witness, challenge)
+        
+        # The witness nonce stays private
+        self.assertEqual(response.nonce, "")
+        
+        # A step that matches the instance but not the path is rejected
+        other = witness.path[3]
+        original_steps = response.revealed_steps
+        response.revealed_steps = [(0,) + other] + original_steps[1:]
+        self.assertFalse(self.protocol.verify_response(instance, challenge, response))
+        response.revealed_steps = original_steps
+        
+        # As are missing or malformed openings
+        original_openings = response.openings
+        response.openings = [None] + original_openings[1:]
+        self.assertFalse(self.protocol.verify_response(instance, challenge, response))
+        leaf_nonce, siblings = original_openings[0]
+        response.openings = [("zz", siblings)] + original_openings[1:]
+        self.assertFalse(self.protocol.verify_response(instance, challenge, response))
+        response.openings = [(leaf_nonce, siblings[:-1])] + original_openings[1:]
+        self.assertFalse(self.protocol.verify_response(instance, challenge, response))
+        
+        response.openings = original_openings
+        self.assertTrue(self.protocol.verify_response(instance, challenge, response))
+    
     def test_empty_path(self):
         """Test handling of empty paths."""
         instance = self.protocol.create_instance(size=3)
@@ -183,6 +403,38 @@ class TestCommitment(unittest.TestCase):
         # Can't open to different value
         self.assertFalse(Commitment.verify(commitment, value2, nonce))
     
+    def test_bytes_commitment(self):
+        """Test committing to pre-serialized bytes."""
+        commitment, nonce = Commitment.create_bytes(b"test_value")
+        
+        self.assertEqual(len(commitment), 64)
+        self.assertTrue(Commitment.verify(commitment, "test_value", nonce))
+    
+    def test_path_commitment(self):
+        """Test that paths are committed in their packed form."""
+        from spectralzk.protocol import _pack_path
+        path = [(Point(0, 0), "A"), (Point(1, 0), "C")]
+        commitment, nonce = Commitment.create(path)
+        
+        self.assertEqual(Commitment.create_bytes(_pack_path(path), nonce)[0], commitment)
+        self.assertTrue(Commitment.verify(commitment, path, nonce))
+        self.assertFalse(Commitment.verify(commitment, [(Point(0, 0), "A")], nonce))
+        
+        # Paths that cannot be packed are still committed to
+        fake_path = [(Point(0, 0), "X")]
+        commitment, nonce = Commitment.create(fake_path)
+        self.assertTrue(Commitment.verify(commitment, fake_path, nonce))
+    
+    def test_nonce_pool(self):
+        """Test that pooled nonces do not repeat across refills."""
+        from spectralzk.commitment import _NoncePool
+        pool = _NoncePool(block_size=64)
+        nonces = [pool.take(16) for _ in range(20)]
+        
+        self.assertTrue(all(len(n) == 16 for n in nonces))
+        self.assertEqual(len(set(nonces)), 20)
+        self.assertEqual(len(pool.take(100)), 100)
+    
     def test_vector_commitment(self):
         """Test committing to multiple values."""
         values = ["a", "b", "c", "d"]
@@ -190,6 +442,7 @@ class TestCommitment(unittest.TestCase):
         
         self.assertEqual(len(commitment), 64)
         self.assertTrue(Commitment.verify(commitment, values, nonce))
+        self.assertFalse(Commitment.verify(commitment, ["ab", "c", "d"], nonce))
 
 
 if __name__ == '__main__':
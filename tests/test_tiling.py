@@ -2,8 +2,14 @@
 Tests for the tiling module.
 """
 
+import pickle
 import unittest
-from spectralzk import Point, Tiling
+from unittest import mock
+
+import numpy as np
+
+from spectralzk import Point, Tiling, TILE_TYPES, TILE_INDEX
+from spectralzk import _tiling_kernels
 
 
 class TestPoint(unittest.TestCase):
@@ -41,6 +47,30 @@ class TestPoint(unittest.TestCase):
         # Should be usable in sets/dicts
         point_set = {p1}
         self.assertIn(p2, point_set)
+    
+    def test_immutable(self):
+        """Test that points are frozen and survive pickling."""
+        p = Point(1, 2)
+        with self.assertRaises(AttributeError):
+            p.x = 5
+        self.assertEqual(pickle.loads(pickle.dumps(p)), p)
+    
+    def test_integral_coordinates(self):
+        """Test that integral coordinates are stored as ints."""
+        p = Point(5.0, np.int64(7))
+        self.assertIs(type(p.x), int)
+        self.assertIs(type(p.y), int)
+        self.assertEqual(repr(p), "Point(x=5, y=7)")
+        self.assertEqual(Point(0.5, 1).x, 0.5)
+        self.assertEqual(Point(0, 0).distance_to(Point(3.0, 4)), 5.0)
+    
+    def test_tuple_lookup(self):
+        """Test that points and (x, y) tuples are interchangeable keys."""
+        region = {Point(1, 2): "A"}
+        self.assertEqual(Point(1, 2), (1, 2))
+        self.assertNotEqual(Point(1, 2), (2, 1))
+        self.assertEqual(region[(1, 2)], "A")
+        self.assertNotIn((1, 2, 3), region)
 
 
 class TestTiling(unittest.TestCase):
@@ -66,6 +96,13 @@ class TestTiling(unittest.TestCase):
         
         self.assertIn(tile_type, Tiling.TILE_TYPES)
     
+    def test_tile_index(self):
+        """Test the shared tile label table."""
+        self.assertIs(Tiling.TILE_TYPES, TILE_TYPES)
+        self.assertIsInstance(TILE_TYPES, tuple)
+        for i, tile_type in enumerate(TILE_TYPES):
+            self.assertEqual(TILE_INDEX[tile_type], i)
+    
     def test_neighbor_influence(self):
         """Test that neighbors can influence tile type."""
         pos = Point(5.0, 5.0)
@@ -90,6 +127,10 @@ class TestTiling(unittest.TestCase):
         # All should be within radius
         for n in neighbors:
             self.assertLessEqual(center.distance_to(n), 1.5)
+        
+        self.assertEqual(len(self.tiling.get_neighbors(center, 1)), 4)
+        self.assertEqual(self.tiling.get_neighbors(center, 0.5), [])
+        self.assertEqual(self.tiling.get_neighbors(center, -2), [])
     
     def test_region_generation(self):
         """Test region generation."""
@@ -107,6 +148,51 @@ class TestTiling(unittest.TestCase):
         for tile_type in region.values():
             self.assertIn(tile_type, Tiling.TILE_TYPES)
     
+    def test_non_integral_positions(self):
+        """Test that positions off the integer grid are rejected."""
+        self.assertEqual(self.tiling.get_tile_type(Point(2.0, np.int64(3))),
+                         self.tiling.get_tile_type(Point(2, 3)))
+        with self.assertRaises(ValueError):
+            self.tiling.get_tile_type(Point(0.9, 0.9))
+        with self.assertRaises(ValueError):
+            self.tiling.generate_region(2, 1, Point(0.5, 0.5))
+        with self.assertRaises(ValueError):
+            self.tiling.generate_grid(2, 1, Point("a", 0))
+    
+    def test_region_matches_tile_rule(self):
+        """Test that batch generation agrees with get_tile_type."""
+        origin = Point(-2, 3)
+        region = self.tiling.generate_region(6, 4, origin)
+        base = {pos: self.tiling.get_tile_type(pos) for pos in region}
+        
+        for pos, tile_type in region.items():
+            # Constraints use the base types of NW, N, NE and W
+            preceding = [Point(pos.x + dx, pos.y + dy)
+                         for dx, dy in [(-1, -1), (0, -1), (1, -1), (-1, 0)]]
+            neighbor_types = [base[p] for p in preceding if p in base]
+            self.assertEqual(self.tiling.get_tile_type(pos, neighbor_types),
+                             tile_type)
+    
+    def test_grid_matches_region(self):
+        """Test that the array form matches the dict form."""
+        origin = Point(1, 2)
+        grid = self.tiling.generate_grid(4, 3, origin)
+        region = self.tiling.generate_region(4, 3, origin)
+        
+        self.assertEqual(grid.shape, (3, 4))
+        for y in range(3):
+            for x in range(4):
+                pos = Point(origin.x + x, origin.y + y)
+                self.assertEqual(Tiling.TILE_TYPES[grid[y, x]], region[pos])
+    
+    @unittest.skipUnless(_tiling_kernels.HAVE_NUMBA, "numba not installed")
+    def test_compiled_grid_matches_numpy(self):
+        """Test that the numba kernel agrees with the NumPy path."""
+        origin = Point(-7, 5)
+        compiled = self.tiling.generate_grid(64, 64, origin)
+        vectorized = self.tiling._region_indices(64, 64, origin)
+        self.assertTrue((compiled == vectorized).all())
+    
     def test_different_seeds(self):
         """Test that different seeds produce different tilings."""
         tiling1 = Tiling(seed=1)
@@ -137,6 +223,37 @@ class TestTiling(unittest.TestCase):
             self.assertGreaterEqual(rate, 0)
             self.assertLessEqual(rate, 1)
     
+    def test_periodicity_array_input(self):
+        """Test that array and dict inputs give the same rates."""
+        region = self.tiling.generate_region(8, 8)
+        grid = self.tiling.generate_grid(8, 8)
+        
+        self.assertEqual(self.tiling.check_periodicity(region, max_period=4),
+                         self.tiling.check_periodicity(grid, max_period=4))
+    
+    def test_periodicity_irregular_keys(self):
+        """Test off-grid and widely spread dicts against per-key counts."""
+        offgrid = {Point(0, 0): "A", Point(0.5, 0): "B",
+                   Point(1, 1): "A", Point(1.5, 1): "C"}
+        self.assertEqual(self.tiling.check_periodicity(offgrid, max_period=1),
+                         {(1, 1): 0.5})
+        
+        spread = {Point(0, 0): "A", Point(1, 1): "B", Point(3000, 3000): "A"}
+        with mock.patch("numpy.full", side_effect=AssertionError):
+            self.assertEqual(self.tiling.check_periodicity(spread, max_period=2),
+                             {(1, 1): 0.0})
+    
+    @unittest.skipUnless(_tiling_kernels.HAVE_NUMBA, "numba not installed")
+    def test_compiled_periodicity_matches_numpy(self):
+        """Test that the numba periodicity kernel agrees with NumPy."""
+        region = self.tiling.generate_region(64, 64)
+        del region[Point(3, 3)]
+        
+        compiled = self.tiling.check_periodicity(region)
+        with mock.patch("spectralzk.tiling._JIT_MIN_CELLS", float("inf")):
+            vectorized = self.tiling.check_periodicity(region)
+        self.assertEqual(compiled, vectorized)
+    
     def test_find_path(self):
         """Test path finding."""
         region = self.tiling.generate_region(5, 5)
@@ -152,6 +269,14 @@ class TestTiling(unittest.TestCase):
         for pos, tile_type in path:
             self.assertIn(pos, region)
             self.assertEqual(region[pos], tile_type)
+    
+    def test_find_path_seeded(self):
+        """Test that a seeded generator makes the walk reproducible."""
+        region = self.tiling.generate_region(5, 5)
+        
+        path1 = self.tiling.find_path(region, Point(2, 2), 10, np.random.default_rng(3))
+        path2 = self.tiling.find_path(region, Point(2, 2), 10, np.random.default_rng(3))
+        self.assertEqual(path1, path2)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,9 @@
+import dataclasses
 import hashlib
 import sys
+
+import numpy as np
+
 from spectralzk import Point, Tiling, Commitment, SpectralProtocol
 
 
@@ -59,20 +63,19 @@ def verify_tiling_properties():
     
     # Test region generation
     print("\n2. Testing region generation...")
-    region = tiling.generate_region(10, 10)
-    assert len(region) == 100, f"Wrong number of tiles: {len(region)}"
+    region = tiling.generate_grid(10, 10)
+    assert region.size == 100, f"Wrong number of tiles: {region.size}"
     
     # Count tile types
-    type_counts = {}
-    for tile_type in region.values():
-        type_counts[tile_type] = type_counts.get(tile_type, 0) + 1
+    type_counts = np.bincount(region.ravel(), minlength=len(Tiling.TILE_TYPES))
     
     print("   Tile distribution:")
-    for tile_type, count in sorted(type_counts.items()):
-        print(f"     {tile_type}: {count} tiles ({count/len(region)*100:.1f}%)")
+    for tile_type, count in zip(Tiling.TILE_TYPES, type_counts):
+        if count:
+            print(f"     {tile_type}: {count} tiles ({count/region.size*100:.1f}%)")
     
     # All types should appear
-    assert len(type_counts) >= 4, "Should have diverse tile types"
+    assert np.count_nonzero(type_counts) >= 4, "Should have diverse tile types"
     print("   ✓ Good tile type distribution")
     
     # Test aperiodicity
@@ -102,7 +105,7 @@ def verify_protocol():
     instance = protocol.create_instance(size=5)
     
     assert instance.size == 5, f"Wrong size: {instance.size}"
-    assert len(instance.tiles) == 25, f"Wrong tile count: {len(instance.tiles)}"
+    assert instance.tiles_idx.size == 25, f"Wrong tile count: {instance.tiles_idx.size}"
     print("   ✓ Protocol initialization works")
     
     # Generate witness
@@ -114,8 +117,8 @@ def verify_protocol():
     
     # Verify path is valid
     for i, (pos, tile) in enumerate(witness.path):
-        assert pos in instance.tiles, f"Step {i}: position not in tiling"
-        assert instance.tiles[pos] == tile, f"Step {i}: wrong tile type"
+        assert instance.contains(pos), f"Step {i}: position not in tiling"
+        assert instance.tile_at(pos) == tile, f"Step {i}: wrong tile type"
     print("   ✓ Witness generation works")
     
     # Create challenge
@@ -150,13 +153,7 @@ def verify_protocol():
         pos_idx, pos, tile = bad_steps[0]
         bad_steps[0] = (pos_idx, pos, "X")  # Invalid tile type
         
-        bad_response = Response(
-            challenge_id=response.challenge_id,
-            revealed_steps=bad_steps,
-            path_length=response.path_length,
-            commitment=response.commitment,
-            nonce=response.nonce
-        )
+        bad_response = dataclasses.replace(response, revealed_steps=bad_steps)
         
         is_invalid = protocol.verify_response(instance, challenge, bad_response)
         assert not is_invalid, "Modified response should not verify"
@@ -165,25 +162,28 @@ def verify_protocol():
     print("\n✓ Protocol execution verified")
 
 
-def verify_consistency():
+def _run_one(seed):
+    """Run one complete protocol execution and report whether it verified."""
+    protocol = SpectralProtocol(seed=seed)
+    instance = protocol.create_instance(size=4)
+    witness = protocol.generate_witness(instance, path_length=6)
+    challenge = protocol.create_challenge(instance, witness.commitment, 2)
+    response = protocol.respond_to_challenge(witness, challenge)
+    
+    return protocol.verify_response(instance, challenge, response)
+
+
+def verify_consistency(runs=20):
     """Test consistency across multiple runs."""
     test_section("Consistency Check")
     
-    print("\nRunning 20 protocol executions...")
-    
-    successes = 0
-    for i in range(20):
-        protocol = SpectralProtocol(seed=i)
-        instance = protocol.create_instance(size=4)
-        witness = protocol.generate_witness(instance, path_length=6)
-        challenge = protocol.create_challenge(instance, witness.commitment, 2)
-        response = protocol.respond_to_challenge(witness, challenge)
-        
-        if protocol.verify_response(instance, challenge, response):
-            successes += 1
+    print(f"\nRunning {runs} protocol executions...")
     
-    success_rate = successes / 20
-    print(f"\nSuccess rate: {success_rate:.0%} ({successes}/20)")
+    # Serial on purpose: the runs take a few ms in total, far less than
+    # starting a process pool
+    successes = sum(_run_one(seed) for seed in range(runs))
+    success_rate = successes / runs
+    print(f"\nSuccess rate: {success_rate:.0%} ({successes}/{runs})")
     
     assert success_rate >= 0.95, f"Success rate too low: {success_rate:.0%}"
     print("✓ High consistency verified")